@@ -1,7 +1,8 @@
 """Configuration settings for the FastAPI LangExtract application."""
 
 import os
-from typing import List
+from typing import FrozenSet, List, Optional
+from pydantic import PrivateAttr, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -16,12 +17,28 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 10
     allowed_file_types: str = "txt,pdf,docx,xlsx,png,jpg,jpeg"
     
+    # PDF processing settings
+    pdf_backend: str = "pymupdf"  # "pymupdf" or "pdfium"
+    pdf_parallel_min_pages: int = 50
+    # Processes per server worker for parallel PDF extraction; defaults to an
+    # even share of the CPU cores across server_workers
+    pdf_workers: Optional[int] = None
+    
+    # OCR settings
+    tesseract_lang: str = "eng"  # e.g. "eng+deu" for multilingual documents
+    tesseract_oem: int = 1  # LSTM engine only
+    tesseract_psm: int = 6  # Assume a single uniform block of text
+    
     # LangExtract settings
     default_model: str = "gemini-2.5-flash"
     max_workers: int = 10
     extraction_passes: int = 2
     max_char_buffer: int = 1000
     
+    # Server settings (used by `python -m app.main`; the Docker image passes
+    # SERVER_WORKERS to `gunicorn -k uvicorn.workers.UvicornWorker -w` as well).
+    server_workers: int = os.cpu_count() or 1
+    
     # Application settings
     app_title: str = "LangExtract Document Processing API"
     app_description: str = "Extract structured information from documents using Google's LangExtract library"
@@ -31,15 +48,35 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
     
+    # Derived values, computed once at load time because they are read per request
+    _allowed_file_types_list: List[str] = PrivateAttr(default_factory=list)
+    _allowed_file_types_set: FrozenSet[str] = PrivateAttr(default_factory=frozenset)
+    _max_file_size_bytes: int = PrivateAttr(default=0)
+    
+    @model_validator(mode="after")
+    def _compute_derived_values(self) -> "Settings":
+        """Precompute values derived from the raw settings."""
+        self._allowed_file_types_list = [ext.strip().lower() for ext in self.allowed_file_types.split(",")]
+        self._allowed_file_types_set = frozenset(self._allowed_file_types_list)
+        self._max_file_size_bytes = self.max_file_size_mb * 1024 * 1024
+        if self.pdf_workers is None:
+            self.pdf_workers = max(1, (os.cpu_count() or 1) // max(1, self.server_workers))
+        return self
+    
     @property
     def allowed_file_types_list(self) -> List[str]:
         """Get allowed file types as a list."""
-        return [ext.strip().lower() for ext in self.allowed_file_types.split(",")]
+        return self._allowed_file_types_list
+    
+    @property
+    def allowed_file_types_set(self) -> FrozenSet[str]:
+        """Get allowed file types as a set for membership checks."""
+        return self._allowed_file_types_set
     
     @property
     def max_file_size_bytes(self) -> int:
         """Get max file size in bytes."""
-        return self.max_file_size_mb * 1024 * 1024
+        return self._max_file_size_bytes
 
 
 # Global settings instance
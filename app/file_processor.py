@@ -1,153 +1,388 @@
 """File processing utilities for extracting text from various file formats."""
 
 import io
-import os
-from typing import Tuple, Optional
-from pathlib import Path
-
-import PyPDF2
-import fitz  # PyMuPDF
-from docx import Document
-from openpyxl import load_workbook
-from PIL import Image
-import pytesseract
+import multiprocessing
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from itertools import repeat
+from typing import TYPE_CHECKING, List, Tuple, Optional, Union
 
 from app.config import settings
 
+# Extraction backends are imported lazily inside the functions that use them,
+# so workers only load the libraries for file types they actually process.
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
+    import numpy as np
+
+
+# Uploads are read into a bytearray; extractors accept it without copying to bytes
+BytesLike = Union[bytes, bytearray]
+
+# Map lowercase extensions (without the dot) to file types
+_TYPE_MAPPING = {
+    'txt': 'text',
+    'pdf': 'pdf',
+    'docx': 'docx',
+    'doc': 'docx',  # Treat as docx for simplicity
+    'xlsx': 'xlsx',
+    'xls': 'xlsx',  # Treat as xlsx for simplicity
+    'png': 'image',
+    'jpg': 'image',
+    'jpeg': 'image',
+    'gif': 'image',
+    'bmp': 'image',
+    'tiff': 'image',
+}
+
+# WordprocessingML tags needed to pull paragraph text out of word/document.xml
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_TEXT = _W_NS + 't'
+_W_PARAGRAPH = _W_NS + 'p'
+_W_RUN = _W_NS + 'r'
+_W_BREAK = _W_NS + 'br'
+_W_BREAK_TYPE = _W_NS + 'type'
+
+# Word stores text boxes and shapes twice inside mc:AlternateContent; the
+# mc:Fallback (VML) copy duplicates the mc:Choice one and is skipped
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# Run-level elements that stand for characters, rendered as python-docx did
+_W_SPECIAL_CHARS = {
+    _W_NS + 'tab': '\t',
+    _W_BREAK: '\n',
+    _W_NS + 'cr': '\n',
+}
+
+# PDF pages with less extractable text than this are treated as scanned and OCR'd
+_MIN_PAGE_TEXT_CHARS = 10
+_PDF_OCR_DPI = 200
+
+
+def _new_pdf_executor() -> ProcessPoolExecutor:
+    """Create the process pool used for page-parallel PDF extraction."""
+    # Forking a threaded server process can deadlock the child, so start
+    # workers from a clean forkserver (or spawn where that is unavailable)
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(
+        max_workers=settings.pdf_workers, mp_context=multiprocessing.get_context(method)
+    )
+
+
+# Shared pool for page-parallel PDF extraction; worker processes are only
+# spawned on first use, so importing this module stays cheap.
+_pdf_executor = _new_pdf_executor()
+_pdf_executor_lock = threading.Lock()
+
+# Tesseract runs out of process, so threads are enough to OCR frames in parallel
+_ocr_executor = ThreadPoolExecutor(max_workers=settings.max_workers)
+
+
+def _extension(filename: str) -> str:
+    """Return the lowercase extension of ``filename`` without the dot."""
+    _, dot, extension = filename.rpartition('.')
+    return extension.lower() if dot else ''
+
+
+def _tesseract_config() -> str:
+    """Build the Tesseract CLI flags from settings."""
+    return (
+        f"--oem {settings.tesseract_oem} --psm {settings.tesseract_psm} "
+        "-c tessedit_do_invert=0"
+    )
+
+
+def _ocr_grayscale(gray: "np.ndarray", lang: str) -> str:
+    """Binarize a grayscale image and run Tesseract OCR on it."""
+    import cv2
+    import pytesseract
+    
+    # Binarize up front so Tesseract can skip its own thresholding pass
+    binary = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+    )
+    return pytesseract.image_to_string(binary, lang=lang, config=_tesseract_config()).strip()
+
+
+def _replace_broken_pdf_executor(broken: ProcessPoolExecutor) -> None:
+    """Swap in a fresh PDF pool after a worker died, unless another thread already did."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is broken:
+            broken.shutdown(wait=False)
+            _pdf_executor = _new_pdf_executor()
+
+
+@lru_cache(maxsize=None)
+def _tesseract_available() -> bool:
+    """Return whether the Tesseract binary used by pytesseract can be found."""
+    import pytesseract
+    
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+
+def _ocr_pdf_page_fallback(text: str, render_gray) -> str:
+    """Return ``text``, or OCR the page via ``render_gray()`` if it looks image-only."""
+    # Without Tesseract, don't pay for rendering pages that can't be OCR'd
+    if len(text.strip()) >= _MIN_PAGE_TEXT_CHARS or not _tesseract_available():
+        return text
+    
+    import pytesseract
+    
+    try:
+        ocr_text = _ocr_grayscale(render_gray(), settings.tesseract_lang)
+    except (pytesseract.TesseractNotFoundError, pytesseract.TesseractError):
+        # Without a working Tesseract, keep whatever text the page had
+        return text
+    # Keep short text such as a page number if OCR found nothing
+    return ocr_text + "\n" if ocr_text else text
+
+
+def _pymupdf_page_text(page: "fitz.Page") -> str:
+    """Extract a PyMuPDF page's text, falling back to OCR for scanned pages."""
+    import fitz  # PyMuPDF
+    import numpy as np
+    
+    def render_gray() -> np.ndarray:
+        pix = page.get_pixmap(dpi=_PDF_OCR_DPI, colorspace=fitz.csGRAY)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    
+    return _ocr_pdf_page_fallback(page.get_text("text", sort=False), render_gray)
+
+
+def _extract_pdf_page_range(content: BytesLike, start: int, end: int) -> str:
+    """Extract text from pages ``start`` to ``end`` (exclusive) of a PDF."""
+    import fitz  # PyMuPDF
+    
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        return "".join(_pymupdf_page_text(doc[i]) for i in range(start, end))
+
 
 class FileProcessor:
     """Handles text extraction from various file formats."""
     
     @staticmethod
-    def detect_file_type(filename: str, content: bytes) -> str:
+    def detect_file_type(filename: str, content: BytesLike) -> str:
         """Detect file type from filename and content."""
-        extension = Path(filename).suffix.lower()
-        
-        # Map extensions to file types
-        type_mapping = {
-            '.txt': 'text',
-            '.pdf': 'pdf',
-            '.docx': 'docx',
-            '.doc': 'docx',  # Treat as docx for simplicity
-            '.xlsx': 'xlsx',
-            '.xls': 'xlsx',  # Treat as xlsx for simplicity
-            '.png': 'image',
-            '.jpg': 'image',
-            '.jpeg': 'image',
-            '.gif': 'image',
-            '.bmp': 'image',
-            '.tiff': 'image',
-        }
-        
-        return type_mapping.get(extension, 'unknown')
+        return _TYPE_MAPPING.get(_extension(filename), 'unknown')
     
     @staticmethod
-    def validate_file(filename: str, content: bytes) -> Tuple[bool, Optional[str]]:
-        """Validate file type and size."""
+    def classify_and_validate(filename: str, size: int) -> Tuple[str, str, Optional[str]]:
+        """
+        Detect file type and validate type and size in a single pass.
+        
+        Returns:
+            Tuple of (file_type, extension, error_message); error_message is None if valid
+        """
+        extension = _extension(filename)
+        file_type = _TYPE_MAPPING.get(extension, 'unknown')
+        
         # Check file size
-        if len(content) > settings.max_file_size_bytes:
-            return False, f"File size exceeds {settings.max_file_size_mb}MB limit"
+        if size > settings.max_file_size_bytes:
+            return file_type, extension, f"File size exceeds {settings.max_file_size_mb}MB limit"
         
         # Check file type
-        file_type = FileProcessor.detect_file_type(filename, content)
         if file_type == 'unknown':
-            extension = Path(filename).suffix.lower()
-            return False, f"Unsupported file type: {extension}"
+            return file_type, extension, f"Unsupported file type: .{extension}" if extension else "Unsupported file type: "
         
         # Check if file type is allowed
-        extension = Path(filename).suffix.lower().lstrip('.')
-        if extension not in settings.allowed_file_types_list:
-            return False, f"File type '{extension}' not allowed. Allowed types: {settings.allowed_file_types}"
+        if extension not in settings.allowed_file_types_set:
+            return file_type, extension, f"File type '{extension}' not allowed. Allowed types: {settings.allowed_file_types}"
         
-        return True, None
+        return file_type, extension, None
     
     @staticmethod
-    def extract_text_from_pdf(content: bytes) -> str:
-        """Extract text from PDF using PyMuPDF (fallback to PyPDF2)."""
+    def extract_text_from_pdf(content: BytesLike) -> str:
+        """
+        Extract text from PDF using PyMuPDF, sharding large documents across processes.
+        
+        Pages without a text layer (scanned pages) are rendered and OCR'd.
+        """
         try:
-            # Try PyMuPDF first (better text extraction)
-            doc = fitz.open(stream=content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text.strip()
-        except Exception:
-            # Fallback to PyPDF2
+            import fitz  # PyMuPDF
+            
+            with fitz.open(stream=content, filetype="pdf") as doc:
+                if doc.needs_pass:
+                    raise ValueError("PDF is password-protected")
+                page_count = doc.page_count
+                if page_count < settings.pdf_parallel_min_pages:
+                    return "".join(_pymupdf_page_text(page) for page in doc).strip()
+            
+            # Split pages into one contiguous range per pool worker; map keeps them in order
+            shards = min(settings.pdf_workers, page_count)
+            bounds = [page_count * i // shards for i in range(shards + 1)]
+            executor = _pdf_executor
             try:
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text.strip()
-            except Exception as e:
-                raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+                parts = list(executor.map(
+                    _extract_pdf_page_range, repeat(content), bounds[:-1], bounds[1:]
+                ))
+            except BrokenProcessPool:
+                # A worker was killed (e.g. OOM or a MuPDF crash); rebuild the pool
+                # for later requests, but don't retry a possibly crashing document
+                # in the server process
+                _replace_broken_pdf_executor(executor)
+                raise ValueError("PDF worker process terminated unexpectedly")
+            return "".join(parts).strip()
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+    
+    @staticmethod
+    def extract_text_from_pdf_pdfium(content: BytesLike) -> str:
+        """Extract text from PDF using pypdfium2, OCR'ing pages without a text layer."""
+        try:
+            import pypdfium2 as pdfium
+            
+            pdf = pdfium.PdfDocument(io.BytesIO(content))
+            try:
+                parts: List[str] = []
+                for page in pdf:
+                    try:
+                        textpage = page.get_textpage()
+                        try:
+                            # Match PyMuPDF's output: "\n" line endings, each page ending in a newline
+                            text = textpage.get_text_range().replace("\r\n", "\n")
+                        finally:
+                            textpage.close()
+                        text = _ocr_pdf_page_fallback(
+                            text,
+                            lambda: page.render(scale=_PDF_OCR_DPI / 72, grayscale=True).to_numpy()
+                        )
+                        parts.append(text if text.endswith("\n") else text + "\n")
+                    finally:
+                        page.close()
+                return "".join(parts).strip()
+            finally:
+                pdf.close()
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
     
     @staticmethod
-    def extract_text_from_docx(content: bytes) -> str:
-        """Extract text from DOCX file."""
+    def extract_text_from_docx(content: BytesLike) -> str:
+        """Extract text from DOCX file by streaming its document XML."""
         try:
-            doc = Document(io.BytesIO(content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            from lxml import etree
+            
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                with archive.open('word/document.xml') as document_xml:
+                    paragraphs: List[str] = []
+                    # One run buffer per open paragraph, since text box paragraphs
+                    # are nested inside the paragraph that anchors them
+                    open_paragraphs: List[List[str]] = []
+                    fallback_depth = 0
+                    for event, elem in etree.iterparse(
+                        document_xml, events=('start', 'end'),
+                        tag=(_W_TEXT, _W_PARAGRAPH, _MC_FALLBACK, *_W_SPECIAL_CHARS)
+                    ):
+                        if elem.tag == _MC_FALLBACK:
+                            fallback_depth += 1 if event == 'start' else -1
+                        elif fallback_depth:
+                            continue
+                        elif elem.tag == _W_PARAGRAPH:
+                            if event == 'start':
+                                open_paragraphs.append([])
+                            else:
+                                paragraphs.append("".join(open_paragraphs.pop()))
+                                elem.clear()
+                        elif event == 'start' or not open_paragraphs:
+                            continue
+                        elif elem.tag == _W_TEXT:
+                            if elem.text:
+                                open_paragraphs[-1].append(elem.text)
+                        # Skip tab stop definitions and page/column breaks
+                        elif elem.getparent().tag == _W_RUN and (
+                            elem.tag != _W_BREAK
+                            or elem.get(_W_BREAK_TYPE, 'textWrapping') == 'textWrapping'
+                        ):
+                            open_paragraphs[-1].append(_W_SPECIAL_CHARS[elem.tag])
+            return "\n".join(paragraphs).strip()
         except Exception as e:
             raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
     
     @staticmethod
-    def extract_text_from_xlsx(content: bytes) -> str:
+    def extract_text_from_xlsx(content: BytesLike) -> str:
         """Extract text from XLSX file."""
         try:
-            workbook = load_workbook(io.BytesIO(content), data_only=True)
-            text = ""
+            from openpyxl import load_workbook
             
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text += f"Sheet: {sheet_name}\n"
+            workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+            try:
+                parts: List[str] = []
                 
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = "\t".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        text += row_text + "\n"
-                text += "\n"
-            
-            return text.strip()
+                for sheet_name in workbook.sheetnames:
+                    sheet = workbook[sheet_name]
+                    parts.append(f"Sheet: {sheet_name}\n")
+                    
+                    for row in sheet.iter_rows(values_only=True):
+                        row_text = "\t".join(
+                            "" if cell is None else cell if isinstance(cell, str) else str(cell)
+                            for cell in row
+                        )
+                        if row_text.strip():
+                            parts.append(row_text + "\n")
+                    parts.append("\n")
+                
+                return "".join(parts).strip()
+            finally:
+                workbook.close()
         except Exception as e:
             raise ValueError(f"Failed to extract text from XLSX: {str(e)}")
     
     @staticmethod
-    def extract_text_from_image(content: bytes) -> str:
-        """Extract text from image using OCR (Tesseract)."""
+    def extract_text_from_image(content: BytesLike, lang: Optional[str] = None) -> str:
+        """
+        Extract text from image using OCR (Tesseract) after binarizing it with OpenCV.
+        
+        ``lang`` overrides ``settings.tesseract_lang`` (e.g. ``"eng+deu"`` for
+        multilingual documents).
+        """
+        lang = lang or settings.tesseract_lang
         try:
+            import cv2
+            import numpy as np
+            from PIL import Image, ImageSequence
+            
             image = Image.open(io.BytesIO(content))
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # OCR each page of a multi-page TIFF concurrently, keeping page order
+            if image.format == 'TIFF' and getattr(image, 'n_frames', 1) > 1:
+                frames = [np.asarray(frame.convert('L')) for frame in ImageSequence.Iterator(image)]
+                texts = _ocr_executor.map(partial(_ocr_grayscale, lang=lang), frames)
+                return "\n".join(texts).strip()
+            
+            gray = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                # OpenCV cannot decode some formats (e.g. GIF); let Pillow handle them
+                gray = np.asarray(image.convert('L'))
             
-            # Use Tesseract OCR to extract text
-            text = pytesseract.image_to_string(image)
-            return text.strip()
+            return _ocr_grayscale(gray, lang)
         except Exception as e:
             raise ValueError(f"Failed to extract text from image using OCR: {str(e)}")
     
     @staticmethod
-    def extract_text(filename: str, content: bytes) -> Tuple[str, str]:
-        """Extract text from file based on its type."""
-        file_type = FileProcessor.detect_file_type(filename, content)
+    def extract_text(filename: str, content: BytesLike, file_type: Optional[str] = None) -> Tuple[str, str]:
+        """Extract text from file based on its type, detecting it unless already known."""
+        file_type = file_type or FileProcessor.detect_file_type(filename, content)
         
         if file_type == 'text':
             try:
-                text = content.decode('utf-8')
+                text = str(content, 'utf-8')
             except UnicodeDecodeError:
                 try:
-                    text = content.decode('latin-1')
+                    text = str(content, 'latin-1')
                 except UnicodeDecodeError:
                     raise ValueError("Unable to decode text file")
         
         elif file_type == 'pdf':
-            text = FileProcessor.extract_text_from_pdf(content)
+            if settings.pdf_backend == 'pdfium':
+                text = FileProcessor.extract_text_from_pdf_pdfium(content)
+            elif settings.pdf_backend == 'pymupdf':
+                text = FileProcessor.extract_text_from_pdf(content)
+            else:
+                raise ValueError(f"Unsupported PDF backend: {settings.pdf_backend}")
         
         elif file_type == 'docx':
             text = FileProcessor.extract_text_from_docx(content)
@@ -1,12 +1,85 @@
 """LangExtract service for document processing and information extraction."""
 
+import functools
+import importlib.util
 import time
-from typing import List, Dict, Any, Optional, Tuple
-import langextract as lx
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
 from app.config import settings
 from app.models import ExtractionEntity
 
+if TYPE_CHECKING:
+    import langextract as lx
+
+
+@functools.lru_cache(maxsize=None)
+def _lx():
+    """Import langextract on first use, keeping it out of worker startup."""
+    import langextract
+    return langextract
+
+
+_DEFAULT_SAMPLE_TEXT = "John Smith visited New York on January 15, 2024, to meet with Dr. Sarah Johnson."
+
+# Common extraction patterns, keyed by lowercase extraction class
+_CLASS_PATTERNS = {
+    'person': {'text': 'John Smith', 'attributes': {'type': 'full_name'}},
+    'name': {'text': 'John Smith', 'attributes': {'type': 'person_name'}},
+    'location': {'text': 'New York', 'attributes': {'type': 'city'}},
+    'place': {'text': 'New York', 'attributes': {'type': 'city'}},
+    'date': {'text': 'January 15, 2024', 'attributes': {'format': 'full_date'}},
+    'time': {'text': 'January 15, 2024', 'attributes': {'type': 'date'}},
+    'organization': {'text': 'Dr. Sarah Johnson', 'attributes': {'type': 'professional_title'}},
+    'title': {'text': 'Dr.', 'attributes': {'type': 'professional_title'}},
+    'email': {'text': 'example@email.com', 'attributes': {'type': 'contact'}},
+    'phone': {'text': '(555) 123-4567', 'attributes': {'type': 'contact'}},
+    'address': {'text': 'New York', 'attributes': {'type': 'location'}},
+    'company': {'text': 'Company Name', 'attributes': {'type': 'business'}},
+    'product': {'text': 'Product Name', 'attributes': {'type': 'item'}},
+    'money': {'text': '$100', 'attributes': {'currency': 'USD'}},
+    'amount': {'text': '$100', 'attributes': {'type': 'monetary'}},
+}
+
+# Generic example for unknown classes
+_GENERIC_PATTERN = {'text': 'example_text', 'attributes': {'type': 'generic'}}
+
+# Model ID prefixes served by OpenAI
+_OPENAI_PREFIXES = ('gpt-', 'text-', 'davinci', 'curie', 'babbage', 'ada')
+
+
+@functools.lru_cache(maxsize=64)
+def _is_openai(model_id: str) -> bool:
+    """Return whether ``model_id`` names an OpenAI model."""
+    return model_id.startswith(_OPENAI_PREFIXES)
+
+
+@functools.lru_cache(maxsize=256)
+def _build_examples(extraction_classes: Tuple[str, ...], sample_text: str) -> Tuple["lx.data.ExampleData", ...]:
+    """
+    Build (and memoize) LangExtract example data for the given classes.
+    
+    The cached objects are shared across requests and threads; they are never
+    mutated after construction.
+    """
+    lx = _lx()
+    sample_extractions = []
+    for extraction_class in extraction_classes:
+        pattern = _CLASS_PATTERNS.get(extraction_class.lower(), _GENERIC_PATTERN)
+        sample_extractions.append(
+            lx.data.Extraction(
+                extraction_class=extraction_class,
+                extraction_text=pattern['text'],
+                attributes=dict(pattern['attributes'])
+            )
+        )
+    
+    return (
+        lx.data.ExampleData(
+            text=sample_text,
+            extractions=sample_extractions
+        ),
+    )
+
 
 class LangExtractService:
     """Service for processing documents with LangExtract."""
@@ -14,61 +87,22 @@ class LangExtractService:
     def __init__(self):
         """Initialize the LangExtract service."""
         self.api_key = settings.langextract_api_key or settings.openai_api_key
-    
-    def create_examples_from_classes(self, extraction_classes: List[str], sample_text: str = None) -> List[lx.data.ExampleData]:
-        """Create example data for LangExtract based on extraction classes."""
-        if not sample_text:
-            sample_text = "John Smith visited New York on January 15, 2024, to meet with Dr. Sarah Johnson."
         
-        # Create sample extractions based on the requested classes
-        sample_extractions = []
-        
-        # Common extraction patterns
-        class_patterns = {
-            'person': {'text': 'John Smith', 'attributes': {'type': 'full_name'}},
-            'name': {'text': 'John Smith', 'attributes': {'type': 'person_name'}},
-            'location': {'text': 'New York', 'attributes': {'type': 'city'}},
-            'place': {'text': 'New York', 'attributes': {'type': 'city'}},
-            'date': {'text': 'January 15, 2024', 'attributes': {'format': 'full_date'}},
-            'time': {'text': 'January 15, 2024', 'attributes': {'type': 'date'}},
-            'organization': {'text': 'Dr. Sarah Johnson', 'attributes': {'type': 'professional_title'}},
-            'title': {'text': 'Dr.', 'attributes': {'type': 'professional_title'}},
-            'email': {'text': 'example@email.com', 'attributes': {'type': 'contact'}},
-            'phone': {'text': '(555) 123-4567', 'attributes': {'type': 'contact'}},
-            'address': {'text': 'New York', 'attributes': {'type': 'location'}},
-            'company': {'text': 'Company Name', 'attributes': {'type': 'business'}},
-            'product': {'text': 'Product Name', 'attributes': {'type': 'item'}},
-            'money': {'text': '$100', 'attributes': {'currency': 'USD'}},
-            'amount': {'text': '$100', 'attributes': {'type': 'monetary'}},
+        # Fixed, provider-specific extraction parameters; copied and filled per request
+        self._openai_base_params = {
+            'api_key': settings.openai_api_key,
+            'fence_output': True,
+            'use_schema_constraints': False,
+            'max_char_buffer': settings.max_char_buffer,
         }
-        
-        for extraction_class in extraction_classes:
-            class_lower = extraction_class.lower()
-            if class_lower in class_patterns:
-                pattern = class_patterns[class_lower]
-                sample_extractions.append(
-                    lx.data.Extraction(
-                        extraction_class=extraction_class,
-                        extraction_text=pattern['text'],
-                        attributes=pattern['attributes']
-                    )
-                )
-            else:
-                # Generic example for unknown classes
-                sample_extractions.append(
-                    lx.data.Extraction(
-                        extraction_class=extraction_class,
-                        extraction_text="example_text",
-                        attributes={"type": "generic"}
-                    )
-                )
-        
-        return [
-            lx.data.ExampleData(
-                text=sample_text,
-                extractions=sample_extractions
-            )
-        ]
+        self._gemini_base_params = {
+            'api_key': settings.langextract_api_key,
+            'max_char_buffer': settings.max_char_buffer,
+        }
+    
+    def create_examples_from_classes(self, extraction_classes: List[str], sample_text: str = None) -> List["lx.data.ExampleData"]:
+        """Create example data for LangExtract based on extraction classes."""
+        return list(_build_examples(tuple(extraction_classes), sample_text or _DEFAULT_SAMPLE_TEXT))
     
     def process_document(
         self,
@@ -77,15 +111,19 @@ class LangExtractService:
         extraction_classes: List[str],
         model_id: Optional[str] = None,
         max_workers: Optional[int] = None,
-        extraction_passes: Optional[int] = None
+        extraction_passes: Optional[int] = None,
+        include_visualization: bool = False
     ) -> Tuple[List[ExtractionEntity], Dict[str, Any]]:
         """
         Process document with LangExtract and return extracted entities.
         
+        The HTML visualization is only generated when ``include_visualization`` is set.
+        
         Returns:
             Tuple of (entities, metadata)
         """
         start_time = time.time()
+        lx = _lx()
         
         # Use defaults from settings if not provided
         model_id = model_id or settings.default_model
@@ -101,27 +139,17 @@ class LangExtractService:
             if not api_key:
                 raise ValueError("No API key configured. Please set LANGEXTRACT_API_KEY or OPENAI_API_KEY")
             
-            # Determine if we're using OpenAI
-            use_openai = model_id.startswith(('gpt-', 'text-', 'davinci', 'curie', 'babbage', 'ada'))
-            
-            # Configure extraction parameters
-            extract_params = {
-                'text_or_documents': text,
-                'prompt_description': prompt_description,
-                'examples': examples,
-                'model_id': model_id,
-                'max_workers': max_workers,
-                'extraction_passes': extraction_passes,
-                'max_char_buffer': settings.max_char_buffer,
-            }
-            
-            # Add API key
-            if use_openai:
-                extract_params['api_key'] = settings.openai_api_key
-                extract_params['fence_output'] = True
-                extract_params['use_schema_constraints'] = False
-            else:
-                extract_params['api_key'] = settings.langextract_api_key
+            # Start from the provider's fixed parameters and add per-request ones
+            base_params = self._openai_base_params if _is_openai(model_id) else self._gemini_base_params
+            extract_params = base_params.copy()
+            extract_params.update(
+                text_or_documents=text,
+                prompt_description=prompt_description,
+                examples=examples,
+                model_id=model_id,
+                max_workers=max_workers,
+                extraction_passes=extraction_passes,
+            )
             
             # Run extraction
             result = lx.extract(**extract_params)
@@ -139,29 +167,15 @@ class LangExtractService:
                     )
                     entities.append(entity)
             
-            # Generate visualization HTML
+            # Generate visualization HTML directly from the in-memory result
             visualization_html = None
             try:
-                # Save to temporary JSONL and generate visualization
-                if result and hasattr(result, 'extractions') and result.extractions:
-                    # Save results to temporary JSONL file
-                    import tempfile
-                    import os
-
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
-                        temp_file = f.name
-
-                    try:
-                        lx.io.save_annotated_documents([result], output_name=temp_file.replace('.jsonl', ''), output_dir='.')
-                        html_content = lx.visualize(temp_file)
-                        if hasattr(html_content, 'data'):
-                            visualization_html = html_content.data
-                        else:
-                            visualization_html = str(html_content)
-                    finally:
-                        # Clean up temporary file
-                        if os.path.exists(temp_file):
-                            os.unlink(temp_file)
+                if include_visualization and result and hasattr(result, 'extractions') and result.extractions:
+                    html_content = lx.visualize(result)
+                    if hasattr(html_content, 'data'):
+                        visualization_html = html_content.data
+                    else:
+                        visualization_html = str(html_content)
             except Exception as viz_error:
                 print(f"Warning: Could not generate visualization: {viz_error}")
             
@@ -188,11 +202,8 @@ class LangExtractService:
         Returns:
             Tuple of (langextract_available, api_key_configured)
         """
-        try:
-            import langextract
-            langextract_available = True
-        except ImportError:
-            langextract_available = False
+        # Look the package up without importing it, so health checks stay cheap
+        langextract_available = importlib.util.find_spec('langextract') is not None
         
         api_key_configured = bool(self.api_key)
         
@@ -2,9 +2,11 @@
 
 import time
 from typing import List
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 
 from app.config import settings
@@ -21,7 +23,8 @@ app = FastAPI(
     description=settings.app_description,
     version=settings.app_version,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -33,10 +36,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (entity lists, visualization HTML) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Initialize services
 file_processor = FileProcessor()
 langextract_service = LangExtractService()
 
+# Size of each read when buffering an upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Allowance for multipart boundaries and form fields on top of the file itself
+MAX_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Reject uploads whose declared Content-Length is over the limit.
+    
+    This runs before FastAPI parses the multipart body, so oversized uploads
+    are refused without being read. A missing or understated Content-Length
+    is still caught by the capped chunked read in ``read_upload``.
+    """
+    if request.method == "POST" and request.url.path == "/extract":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > settings.max_file_size_bytes + MAX_FORM_OVERHEAD_BYTES:
+            return ORJSONResponse(
+                status_code=413,
+                content={"detail": f"File size exceeds {settings.max_file_size_mb}MB limit"}
+            )
+    return await call_next(request)
+
+
+async def read_upload(file: UploadFile) -> bytearray:
+    """Read an upload in chunks, rejecting it as soon as it exceeds the size limit."""
+    content = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return content
+        content += chunk
+        if len(content) > settings.max_file_size_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds {settings.max_file_size_mb}MB limit"
+            )
+
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -83,14 +129,15 @@ async def health_check():
     )
 
 
-@app.post("/extract", response_model=ExtractionResponse)
+@app.post("/extract", response_model=ExtractionResponse, response_model_exclude_none=True)
 async def extract_from_file(
     file: UploadFile = File(..., description="Document file to process"),
     prompt_description: str = Form(..., description="Description of what to extract"),
     extraction_classes: str = Form(..., description="Comma-separated list of entity types to extract"),
     model_id: str = Form(default=None, description="LLM model to use"),
     max_workers: int = Form(default=None, description="Number of parallel workers"),
-    extraction_passes: int = Form(default=None, description="Number of extraction passes")
+    extraction_passes: int = Form(default=None, description="Number of extraction passes"),
+    include_visualization: bool = Form(default=False, description="Include HTML visualization in the response")
 ):
     """
     Extract structured information from uploaded document.
@@ -101,32 +148,37 @@ async def extract_from_file(
     start_time = time.time()
     
     try:
-        # Read file content
-        content = await file.read()
+        # Read file content, aborting early on oversized uploads
+        content = await read_upload(file)
         
         # Validate file
-        is_valid, error_message = file_processor.validate_file(file.filename, content)
-        if not is_valid:
+        file_type, _, error_message = file_processor.classify_and_validate(file.filename, len(content))
+        if error_message:
             raise HTTPException(status_code=400, detail=error_message)
         
-        # Extract text from file
+        # Extract text from file off the event loop (PDF parsing and OCR block)
         try:
-            text, file_type = file_processor.extract_text(file.filename, content)
+            text, file_type = await run_in_threadpool(
+                file_processor.extract_text, file.filename, content, file_type
+            )
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         
         # Parse extraction classes
         extraction_classes_list = [cls.strip() for cls in extraction_classes.split(",")]
         
-        # Process with LangExtract
+        # Process with LangExtract in a worker thread so the blocking LLM calls
+        # don't stall the event loop
         try:
-            entities, metadata = langextract_service.process_document(
+            entities, metadata = await run_in_threadpool(
+                langextract_service.process_document,
                 text=text,
                 prompt_description=prompt_description,
                 extraction_classes=extraction_classes_list,
                 model_id=model_id,
                 max_workers=max_workers,
-                extraction_passes=extraction_passes
+                extraction_passes=extraction_passes,
+                include_visualization=include_visualization
             )
         except ValueError as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -153,14 +205,15 @@ async def extract_from_file(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/extract-text", response_model=ExtractionResponse)
+@app.post("/extract-text", response_model=ExtractionResponse, response_model_exclude_none=True)
 async def extract_from_text(
     text: str = Form(..., description="Text content to process"),
     prompt_description: str = Form(..., description="Description of what to extract"),
     extraction_classes: str = Form(..., description="Comma-separated list of entity types to extract"),
     model_id: str = Form(default=None, description="LLM model to use"),
     max_workers: int = Form(default=None, description="Number of parallel workers"),
-    extraction_passes: int = Form(default=None, description="Number of extraction passes")
+    extraction_passes: int = Form(default=None, description="Number of extraction passes"),
+    include_visualization: bool = Form(default=False, description="Include HTML visualization in the response")
 ):
     """
     Extract structured information from provided text.
@@ -181,15 +234,18 @@ async def extract_from_text(
         # Parse extraction classes
         extraction_classes_list = [cls.strip() for cls in extraction_classes.split(",")]
         
-        # Process with LangExtract
+        # Process with LangExtract in a worker thread so the blocking LLM calls
+        # don't stall the event loop
         try:
-            entities, metadata = langextract_service.process_document(
+            entities, metadata = await run_in_threadpool(
+                langextract_service.process_document,
                 text=text,
                 prompt_description=prompt_description,
                 extraction_classes=extraction_classes_list,
                 model_id=model_id,
                 max_workers=max_workers,
-                extraction_passes=extraction_passes
+                extraction_passes=extraction_passes,
+                include_visualization=include_visualization
             )
         except ValueError as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -242,5 +298,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        # Picks uvloop/httptools when installed (uvicorn[standard], not on Windows)
+        loop="auto",
+        http="auto",
+        workers=settings.server_workers
     )
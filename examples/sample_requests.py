@@ -1,43 +1,93 @@
 """Sample requests for the LangExtract FastAPI application."""
 
+import argparse
+import hashlib
+import io
+import os
+import orjson
+import tempfile
 import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
 
 
 # Base URL for the API
 BASE_URL = "http://localhost:8000"
 
+# Shared session so every example reuses one keep-alive connection
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
-def example_1_basic_text_extraction():
-    """Example 1: Basic text extraction from a simple sentence."""
-    print("Example 1: Basic Text Extraction")
-    print("-" * 40)
-    
-    data = {
-        "text": "Apple Inc. was founded by Steve Jobs in Cupertino, California on April 1, 1976.",
-        "prompt_description": "Extract company names, person names, locations, and dates",
-        "extraction_classes": "company,person,location,date"
-    }
-    
-    response = requests.post(f"{BASE_URL}/extract-text", data=data)
+# Successful responses are cached here so re-runs skip the LLM call (disable with --no-cache)
+CACHE_DIR = Path(".cache")
+use_cache = True
+
+
+def _cache_key(path: str, data: Dict[str, str], upload: Optional[Tuple[str, bytes, str]]) -> str:
+    """Hash a request into a cache key, length-prefixing each part so boundaries can't collide."""
+    parts = [path.encode("utf-8")]
+    for name, value in sorted(data.items()):
+        parts += [name.encode("utf-8"), value.encode("utf-8")]
+    if upload:
+        parts += [upload[0].encode("utf-8"), upload[1]]
+    
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def cached_post(
+    path: str, data: Dict[str, str], upload: Optional[Tuple[str, bytes, str]] = None
+) -> Tuple[int, Any]:
+    """
+    POST to the API, serving successful responses from the on-disk cache.
     
-    if response.status_code == 200:
-        result = response.json()
-        print(f"✓ Found {result['entity_count']} entities:")
-        for entity in result['entities']:
-            print(f"  {entity['extraction_class']}: '{entity['extraction_text']}'")
-    else:
-        print(f"✗ Error: {response.text}")
+    ``upload`` is an optional ``(filename, content, content_type)`` file.
     
-    print()
+    Returns:
+        Tuple of (status_code, body): the parsed JSON on success, else the error text
+    """
+    cache_file = CACHE_DIR / f"{_cache_key(path, data, upload)}.json"
+    if use_cache:
+        try:
+            return 200, orjson.loads(cache_file.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            # Missing or unreadable entries are treated as a miss and rewritten
+            pass
+    
+    files = None
+    if upload:
+        filename, content, content_type = upload
+        files = {"file": (filename, io.BytesIO(content), content_type)}
+    
+    response = SESSION.post(f"{BASE_URL}{path}", data=data, files=files)
+    if response.status_code != 200:
+        return response.status_code, response.text
+    
+    if use_cache:
+        CACHE_DIR.mkdir(exist_ok=True)
+        # Write to a temp file and rename it into place, so an interrupted run
+        # never leaves a truncated entry behind
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False) as tmp:
+            tmp.write(response.content)
+        os.replace(tmp.name, cache_file)
+    return 200, orjson.loads(response.content)
 
 
-def example_2_medical_text():
-    """Example 2: Medical text processing."""
-    print("Example 2: Medical Text Processing")
-    print("-" * 40)
-    
-    medical_text = """
+# Example 1: Basic text extraction from a simple sentence
+_EX1_DATA = {
+    "text": "Apple Inc. was founded by Steve Jobs in Cupertino, California on April 1, 1976.",
+    "prompt_description": "Extract company names, person names, locations, and dates",
+    "extraction_classes": "company,person,location,date"
+}
+
+# Example 2: Medical text processing
+_EX2_DATA = {
+    "text": """
     Patient: Maria Rodriguez
     DOB: 05/15/1985
     Date of Visit: 12/08/2024
@@ -53,36 +103,15 @@ def example_2_medical_text():
     
     Assessment: Tension headache, likely stress-related
     Plan: Continue current medications, follow up in 1 week
-    """
-    
-    data = {
-        "text": medical_text,
-        "prompt_description": "Extract patient information, symptoms, medications, and medical assessments",
-        "extraction_classes": "patient,symptom,medication,diagnosis,date",
-        "model_id": "gemini-2.5-flash"
-    }
-    
-    response = requests.post(f"{BASE_URL}/extract-text", data=data)
-    
-    if response.status_code == 200:
-        result = response.json()
-        print(f"✓ Found {result['entity_count']} entities:")
-        for entity in result['entities']:
-            print(f"  {entity['extraction_class']}: '{entity['extraction_text']}'")
-            if entity['attributes']:
-                print(f"    Attributes: {entity['attributes']}")
-    else:
-        print(f"✗ Error: {response.text}")
-    
-    print()
+    """,
+    "prompt_description": "Extract patient information, symptoms, medications, and medical assessments",
+    "extraction_classes": "patient,symptom,medication,diagnosis,date",
+    "model_id": "gemini-2.5-flash"
+}
 
-
-def example_3_business_document():
-    """Example 3: Business document processing."""
-    print("Example 3: Business Document Processing")
-    print("-" * 40)
-    
-    business_text = """
+# Example 3: Business document processing
+_EX3_DATA = {
+    "text": """
     SALES REPORT - Q4 2024
     
     Regional Manager: John Thompson
@@ -103,35 +132,14 @@ def example_3_business_document():
     - Increase revenue by 15%
     - Expand into Oregon and Washington markets
     - Launch new product line in February 2025
-    """
-    
-    data = {
-        "text": business_text,
-        "prompt_description": "Extract companies, people, financial amounts, products, and business goals",
-        "extraction_classes": "company,person,money,product,goal,location",
-        "model_id": "gemini-2.5-flash"
-    }
-    
-    response = requests.post(f"{BASE_URL}/extract-text", data=data)
-    
-    if response.status_code == 200:
-        result = response.json()
-        print(f"✓ Found {result['entity_count']} entities:")
-        for entity in result['entities']:
-            print(f"  {entity['extraction_class']}: '{entity['extraction_text']}'")
-    else:
-        print(f"✗ Error: {response.text}")
-    
-    print()
-
+    """,
+    "prompt_description": "Extract companies, people, financial amounts, products, and business goals",
+    "extraction_classes": "company,person,money,product,goal,location",
+    "model_id": "gemini-2.5-flash"
+}
 
-def example_4_file_upload():
-    """Example 4: File upload processing."""
-    print("Example 4: File Upload Processing")
-    print("-" * 40)
-    
-    # Create a sample document
-    sample_content = """
+# Example 4: File upload processing, sent straight from memory
+_EX4_UPLOAD = ("research_paper.txt", """
     RESEARCH PAPER ABSTRACT
     
     Title: Machine Learning Applications in Healthcare
@@ -149,53 +157,61 @@ def example_4_file_upload():
     15% reduction in treatment time when using AI-assisted diagnosis.
     
     Keywords: machine learning, healthcare, diagnosis, clinical decision support
-    """
-    
-    # Save to temporary file
-    with open("temp_research.txt", "w") as f:
-        f.write(sample_content)
-    
-    try:
-        with open("temp_research.txt", "rb") as f:
-            files = {"file": ("research_paper.txt", f, "text/plain")}
-            data = {
-                "prompt_description": "Extract research paper metadata, authors, institutions, and key findings",
-                "extraction_classes": "title,author,institution,date,finding,keyword",
-                "model_id": "gemini-2.5-flash"
-            }
-            
-            response = requests.post(f"{BASE_URL}/extract", files=files, data=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✓ Processed {result['filename']} ({result['file_type']})")
-                print(f"✓ Text length: {result['text_length']} characters")
-                print(f"✓ Found {result['entity_count']} entities:")
-                for entity in result['entities']:
-                    print(f"  {entity['extraction_class']}: '{entity['extraction_text']}'")
-            else:
-                print(f"✗ Error: {response.text}")
-    
-    finally:
-        # Clean up
-        import os
-        if os.path.exists("temp_research.txt"):
-            os.remove("temp_research.txt")
+    """.encode("utf-8"), "text/plain")
+
+_EX4_DATA = {
+    "prompt_description": "Extract research paper metadata, authors, institutions, and key findings",
+    "extraction_classes": "title,author,institution,date,finding,keyword",
+    "model_id": "gemini-2.5-flash"
+}
+
+# (title, endpoint, form data, upload, show entity attributes)
+EXAMPLES = [
+    ("Example 1: Basic Text Extraction", "/extract-text", _EX1_DATA, None, False),
+    ("Example 2: Medical Text Processing", "/extract-text", _EX2_DATA, None, True),
+    ("Example 3: Business Document Processing", "/extract-text", _EX3_DATA, None, False),
+    ("Example 4: File Upload Processing", "/extract", _EX4_DATA, _EX4_UPLOAD, False),
+]
+
+
+def run_example(example: Tuple[str, str, Dict[str, str], Optional[Tuple[str, bytes, str]], bool]) -> str:
+    """Run one example request and return its printable report."""
+    title, path, data, upload, show_attributes = example
+    lines = [title, "-" * 40]
+    
+    status, result = cached_post(path, data, upload)
+    
+    if status == 200:
+        if upload:
+            lines.append(f"✓ Processed {result['filename']} ({result['file_type']})")
+            lines.append(f"✓ Text length: {result['text_length']} characters")
+        lines.append(f"✓ Found {result['entity_count']} entities:")
+        for entity in result['entities']:
+            lines.append(f"  {entity['extraction_class']}: '{entity['extraction_text']}'")
+            if show_attributes and entity['attributes']:
+                lines.append(f"    Attributes: {entity['attributes']}")
+    else:
+        lines.append(f"✗ Error: {result}")
     
-    print()
+    return "\n".join(lines) + "\n"
 
 
 def main():
-    """Run all examples."""
+    """Run all examples concurrently and print their reports in order."""
+    global use_cache
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API instead of reusing cached responses")
+    use_cache = not parser.parse_args().no_cache
+    
     print("LangExtract FastAPI - Sample Requests")
     print("=" * 50)
     print()
     
     try:
-        example_1_basic_text_extraction()
-        example_2_medical_text()
-        example_3_business_document()
-        example_4_file_upload()
+        # The examples are independent I/O-bound requests, so overlap them
+        with ThreadPoolExecutor(max_workers=len(EXAMPLES)) as executor:
+            for report in executor.map(run_example, EXAMPLES):
+                print(report)
         
         print("All examples completed!")
         print("\nNote: Make sure you have set up your API keys in the .env file")
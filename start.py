@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
 """Quick start script for the LangExtract FastAPI application."""
 
+import argparse
+import hashlib
 import os
+import re
+import shutil
 import sys
 import subprocess
 from pathlib import Path
 
 
+# Records the path, mtime and size of the last .env that passed check_env_file
+ENV_OK_MARKER = Path.home() / '.cache' / 'langextract' / 'env_ok'
+
+
+def read_marker(path):
+    """Return a marker file's contents, or an empty string if it doesn't exist."""
+    try:
+        return path.read_text(errors='ignore')
+    except FileNotFoundError:
+        return ''
+
+
+def parse_env_value(value):
+    """Unquote a .env value and drop a trailing ' # comment', as python-dotenv does."""
+    value = value.strip()
+    if value[:1] in ('"', "'"):
+        end = value.find(value[0], 1)
+        if end != -1:
+            return value[1:end]
+    return re.split(r'\s+#', value, maxsplit=1)[0]
+
+
 def check_python_version():
     """Check if Python version is compatible."""
     if sys.version_info < (3, 8):
@@ -17,49 +43,75 @@ def check_python_version():
     return True
 
 
-def check_tesseract():
-    """Check if Tesseract OCR is installed."""
-    try:
-        result = subprocess.run(['tesseract', '--version'], 
-                              capture_output=True, text=True, check=True)
-        version = result.stdout.split('\n')[0]
-        print(f"✅ Tesseract OCR: {version}")
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+def check_tesseract(verify_version=False):
+    """Check if Tesseract OCR is installed, optionally running it to report its version."""
+    path = shutil.which('tesseract')
+    if not path:
         print("❌ Tesseract OCR not found")
         print("Please install Tesseract OCR:")
         print("  Windows: choco install tesseract")
         print("  macOS: brew install tesseract")
         print("  Ubuntu: sudo apt-get install tesseract-ocr")
         return False
+    
+    if not verify_version:
+        print(f"✅ Tesseract OCR: {path}")
+        return True
+    
+    try:
+        result = subprocess.run([path, '--version'], 
+                              capture_output=True, text=True, check=True)
+        version = result.stdout.split('\n')[0]
+        print(f"✅ Tesseract OCR: {version}")
+        return True
+    except (subprocess.CalledProcessError, OSError):
+        print(f"❌ Tesseract OCR at {path} failed to run")
+        return False
 
 
 def check_env_file():
     """Check if .env file exists and has API keys."""
     env_file = Path('.env')
-    if not env_file.exists():
+    try:
+        st = env_file.stat()
+    except FileNotFoundError:
         print("❌ .env file not found")
         print("Creating .env file from template...")
         
-        example_file = Path('.env.example')
-        if example_file.exists():
-            import shutil
-            shutil.copy(example_file, env_file)
-            print("✅ Created .env file from .env.example")
-            print("⚠️  Please edit .env and add your API keys")
-            return False
-        else:
+        try:
+            shutil.copy(Path('.env.example'), env_file)
+        except FileNotFoundError:
             print("❌ .env.example file not found")
             return False
+        print("✅ Created .env file from .env.example")
+        print("⚠️  Please edit .env and add your API keys")
+        return False
+    
+    # Skip re-reading a .env that already passed and hasn't changed since
+    env_signature = f"{env_file.resolve()}\n{st.st_mtime_ns}\n{st.st_size}"
+    if read_marker(ENV_OK_MARKER) == env_signature:
+        print("✅ .env file exists with API keys")
+        return True
     
-    # Check if API keys are configured
+    # Check if API keys are configured, parsing KEY=value lines in one pass
+    keys = {}
     with open(env_file, 'r') as f:
-        content = f.read()
+        for line in f:
+            line = line.strip()
+            if '=' in line and not line.startswith('#'):
+                key, _, value = line.partition('=')
+                keys[key.strip()] = parse_env_value(value)
     
-    has_langextract_key = 'LANGEXTRACT_API_KEY=' in content and 'your_' not in content
-    has_openai_key = 'OPENAI_API_KEY=' in content and 'your_' not in content
+    def is_configured(name):
+        value = keys.get(name, '')
+        return bool(value) and not value.startswith('your_')
+    
+    has_langextract_key = is_configured('LANGEXTRACT_API_KEY')
+    has_openai_key = is_configured('OPENAI_API_KEY')
     
     if has_langextract_key or has_openai_key:
+        ENV_OK_MARKER.parent.mkdir(parents=True, exist_ok=True)
+        ENV_OK_MARKER.write_text(env_signature)
         print("✅ .env file exists with API keys")
         return True
     else:
@@ -71,11 +123,22 @@ def check_env_file():
 
 
 def install_dependencies():
-    """Install Python dependencies."""
+    """Install Python dependencies, skipping pip if already installed for this interpreter."""
+    # Key on the interpreter too, so switching virtualenvs triggers a fresh install
+    requirements_hash = hashlib.sha256(
+        sys.executable.encode() + b'\0' + Path('requirements.txt').read_bytes()
+    ).hexdigest()
+    marker = Path('.deps_installed')
+    if read_marker(marker) == requirements_hash:
+        print("✅ Dependencies up to date")
+        return True
+    
     print("Installing Python dependencies...")
     try:
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], 
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt',
+                        '--disable-pip-version-check', '--no-input', '--prefer-binary'], 
                       check=True)
+        marker.write_text(requirements_hash)
         print("✅ Dependencies installed successfully")
         return True
     except subprocess.CalledProcessError:
@@ -83,28 +146,45 @@ def install_dependencies():
         return False
 
 
-def start_server():
-    """Start the FastAPI server."""
+def start_server(dev=False):
+    """Start the FastAPI server, replacing this process with uvicorn on POSIX."""
     print("\n🚀 Starting FastAPI server...")
     print("Server will be available at: http://localhost:8000")
     print("API Documentation: http://localhost:8000/docs")
     print("Press Ctrl+C to stop the server")
     print("-" * 50)
+    sys.stdout.flush()
     
-    try:
-        subprocess.run([
-            sys.executable, '-m', 'uvicorn', 
-            'app.main:app', 
-            '--reload', 
-            '--host', '0.0.0.0', 
-            '--port', '8000'
-        ])
-    except KeyboardInterrupt:
-        print("\n👋 Server stopped")
+    args = [
+        sys.executable, '-m', 'uvicorn', 
+        'app.main:app', 
+        '--host', '0.0.0.0', 
+        '--port', '8000'
+    ]
+    if dev:
+        args.append('--reload')
+    
+    # On Windows exec spawns a new process and exits, detaching it from Ctrl+C
+    if os.name == 'nt':
+        try:
+            subprocess.run(args)
+        except KeyboardInterrupt:
+            print("\n👋 Server stopped")
+        return
+    
+    # exec so uvicorn takes over this PID and receives Ctrl+C directly
+    os.execv(sys.executable, args)
 
 
 def main():
     """Main setup and start function."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verify-version', action='store_true',
+                        help='Run tesseract to check its version instead of only locating it on PATH')
+    parser.add_argument('--dev', action='store_true',
+                        help='Start the server with auto-reload on code changes')
+    args = parser.parse_args()
+    
     print("LangExtract FastAPI - Quick Start")
     print("=" * 40)
     
@@ -112,7 +192,7 @@ def main():
     if not check_python_version():
         return
     
-    if not check_tesseract():
+    if not check_tesseract(verify_version=args.verify_version):
         print("\n⚠️  Tesseract OCR is required for image processing")
         print("You can still use the API for text and PDF files without it")
     
@@ -129,7 +209,7 @@ def main():
         return
     
     # Start server
-    start_server()
+    start_server(dev=args.dev)
 
 
 if __name__ == "__main__":
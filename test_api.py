@@ -1,31 +1,53 @@
 """Test script for the LangExtract FastAPI application."""
 
+import asyncio
+import io
+import orjson
 import requests
-import json
-from pathlib import Path
+from requests.adapters import HTTPAdapter
 
 
-def test_health_endpoint():
-    """Test the health check endpoint."""
-    print("Testing health endpoint...")
-    response = requests.get("http://localhost:8000/health")
-    print(f"Status: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
+# Shared session so every test reuses one keep-alive connection
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
 
-def test_models_endpoint():
-    """Test the models endpoint."""
-    print("Testing models endpoint...")
-    response = requests.get("http://localhost:8000/models")
-    print(f"Status: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
+async def get(url):
+    """GET ``url`` with the shared session without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, SESSION.get, url)
+
+
+async def test_health_endpoint():
+    """Test the health check endpoint and return the report."""
+    response = await get("http://localhost:8000/health")
+    return "\n".join([
+        "Testing health endpoint...",
+        f"Status: {response.status_code}",
+        f"Response: {orjson.loads(response.content)}",
+        "",
+    ])
+
+
+async def test_models_endpoint():
+    """Test the models endpoint and return the report."""
+    response = await get("http://localhost:8000/models")
+    return "\n".join([
+        "Testing models endpoint...",
+        f"Status: {response.status_code}",
+        f"Response: {orjson.loads(response.content)}",
+        "",
+    ])
+
+
+async def test_get_endpoints():
+    """Run the independent GET endpoint tests concurrently."""
+    return await asyncio.gather(test_health_endpoint(), test_models_endpoint())
 
 
 def test_text_extraction():
     """Test text extraction endpoint."""
-    print("Testing text extraction...")
+    out = ["Testing text extraction..."]
     
     data = {
         "text": "John Smith visited New York on January 15, 2024, to meet with Dr. Sarah Johnson at Microsoft Corporation.",
@@ -34,25 +56,27 @@ def test_text_extraction():
         "model_id": "gemini-2.5-flash"
     }
     
-    response = requests.post("http://localhost:8000/extract-text", data=data)
-    print(f"Status: {response.status_code}")
+    response = SESSION.post("http://localhost:8000/extract-text", data=data)
+    out.append(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
-        print(f"Success: {result['success']}")
-        print(f"Entities found: {result['entity_count']}")
-        print(f"Processing time: {result['processing_time_seconds']:.2f}s")
-        print("Entities:")
-        for entity in result['entities']:
-            print(f"  - {entity['extraction_class']}: '{entity['extraction_text']}'")
+        result = orjson.loads(response.content)
+        out.append(f"Success: {result['success']}")
+        out.append(f"Entities found: {result['entity_count']}")
+        out.append(f"Processing time: {result['processing_time_seconds']:.2f}s")
+        out.append("Entities:")
+        out.extend(f"  - {e['extraction_class']}: '{e['extraction_text']}'" for e in result['entities'])
     else:
-        print(f"Error: {response.text}")
-    print()
+        out.append(f"Error: {response.text}")
+    
+    # Emit the whole report in one write so it can't interleave with other output
+    out.append("")
+    print("\n".join(out))
 
 
 def test_file_upload():
     """Test file upload endpoint."""
-    print("Testing file upload...")
+    out = ["Testing file upload..."]
     
     # Create a sample text file
     sample_text = """
@@ -67,41 +91,31 @@ def test_file_upload():
     Follow-up appointment scheduled for March 22, 2024.
     """
     
-    # Save to temporary file
-    temp_file = Path("temp_test.txt")
-    temp_file.write_text(sample_text)
+    # Upload straight from memory
+    files = {"file": ("test_document.txt", io.BytesIO(sample_text.encode("utf-8")), "text/plain")}
+    data = {
+        "prompt_description": "Extract patient information, medications, and appointments from medical text",
+        "extraction_classes": "patient,doctor,date,medication,appointment",
+        "model_id": "gemini-2.5-flash"
+    }
     
-    try:
-        with open(temp_file, "rb") as f:
-            files = {"file": ("test_document.txt", f, "text/plain")}
-            data = {
-                "prompt_description": "Extract patient information, medications, and appointments from medical text",
-                "extraction_classes": "patient,doctor,date,medication,appointment",
-                "model_id": "gemini-2.5-flash"
-            }
-            
-            response = requests.post("http://localhost:8000/extract", files=files, data=data)
-            print(f"Status: {response.status_code}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"Success: {result['success']}")
-                print(f"File type: {result['file_type']}")
-                print(f"Text length: {result['text_length']}")
-                print(f"Entities found: {result['entity_count']}")
-                print(f"Processing time: {result['processing_time_seconds']:.2f}s")
-                print("Entities:")
-                for entity in result['entities']:
-                    print(f"  - {entity['extraction_class']}: '{entity['extraction_text']}'")
-            else:
-                print(f"Error: {response.text}")
+    response = SESSION.post("http://localhost:8000/extract", files=files, data=data)
+    out.append(f"Status: {response.status_code}")
     
-    finally:
-        # Clean up
-        if temp_file.exists():
-            temp_file.unlink()
+    if response.status_code == 200:
+        result = orjson.loads(response.content)
+        out.append(f"Success: {result['success']}")
+        out.append(f"File type: {result['file_type']}")
+        out.append(f"Text length: {result['text_length']}")
+        out.append(f"Entities found: {result['entity_count']}")
+        out.append(f"Processing time: {result['processing_time_seconds']:.2f}s")
+        out.append("Entities:")
+        out.extend(f"  - {e['extraction_class']}: '{e['extraction_text']}'" for e in result['entities'])
+    else:
+        out.append(f"Error: {response.text}")
     
-    print()
+    out.append("")
+    print("\n".join(out))
 
 
 def main():
@@ -111,8 +125,8 @@ def main():
     print()
     
     try:
-        test_health_endpoint()
-        test_models_endpoint()
+        for report in asyncio.run(test_get_endpoints()):
+            print(report)
         test_text_extraction()
         test_file_upload()
         